@@ -1,20 +0,0 @@
-from google.cloud import aiplatform
-
-def trigger_retraining(event, context):
-    # Set your project and location
-    project = "ml_mentalhealth"
-    location = "us-central1"
-
-    # Initialize the Vertex AI client
-    aiplatform.init(project=project, location=location)
-
-    # Trigger a pipeline or custom training job
-    pipeline = aiplatform.PipelineJob(
-        display_name="retraining-pipeline",
-        template_path="gs://mlops-repo/templates",
-        parameter_values={
-            "input_data": "gs://mlops-repo/input-data",
-            # Add any additional parameters
-        }
-    )
-    pipeline.run(sync=False)
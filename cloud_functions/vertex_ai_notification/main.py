@@ -1,5 +1,22 @@
+import threading
 from google.cloud import aiplatform
 
+# Vertex AI is initialized once per function instance and reused by
+# every warm invocation
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _init_vertex_ai():
+    global _initialized
+
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                aiplatform.init()
+                _initialized = True
+
+
 def notify_vertex_ai(request):
     """
     Triggered by a Pub/Sub message when a new model is registered.
@@ -14,7 +31,7 @@ def notify_vertex_ai(request):
         return "Missing model_id or endpoint_id", 400
 
     # Update the Vertex AI Endpoint with the new model
-    aiplatform.init()
+    _init_vertex_ai()
     endpoint = aiplatform.Endpoint(endpoint_id=endpoint_id)
     endpoint.deploy(model=model_id)
 
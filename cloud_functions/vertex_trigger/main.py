@@ -0,0 +1,179 @@
+"""
+This module contains the Cloud Function to trigger a Vertex AI pipeline
+
+One parametric function serves every pipeline trigger - the initial
+training run as well as retraining. Each deployment points to this same
+source with its own environment:
+
+    PROJECT_ID:             GCP project of the pipeline
+    REGION:                 Vertex AI region
+    TEMPLATE_PATH:          gs:// URI of the compiled pipeline template
+    PIPELINE_ROOT:          gs:// root for the pipeline run artifacts
+    DISPLAY_NAME:           Pipeline job display name
+    PARAMETER_VALUES_JSON:  Default pipeline parameters (JSON object)
+
+Entry points:
+    handle:         HTTP trigger, request parameters override the defaults
+    handle_event:   Background (Pub/Sub) trigger, uses the defaults
+
+Steps:
+    1. Parse the request payload
+    2. Initialize Vertex AI
+    3. Trigger the pipeline
+    4. Handle exceptions
+    5. Return the response
+
+Vertex AI and Cloud Logging clients are created once per function instance
+and reused by every warm invocation, so the gRPC channel and the ADC
+authentication are not redone on each request.
+"""
+
+import os
+import json
+import threading
+from google.cloud import aiplatform, storage
+
+import logging
+from google.cloud import logging as cloud_logging
+
+# Read the function configuration once per instance
+PROJECT_ID = os.environ.get('PROJECT_ID')
+REGION = os.environ.get('REGION')
+TEMPLATE_PATH = os.environ.get('TEMPLATE_PATH')
+PIPELINE_ROOT = os.environ.get('PIPELINE_ROOT')
+DISPLAY_NAME = os.environ.get('DISPLAY_NAME', 'data-preprocessing-pipeline')
+PARAMETER_VALUES = json.loads(os.environ.get('PARAMETER_VALUES_JSON', '{}'))
+
+# Initialize the Cloud Logging client
+cloud_logging.Client().setup_logging()
+
+# Cached clients - initialized on first use, shared across invocations
+_client_lock = threading.Lock()
+_pipeline_client = None
+_storage_client = None
+
+
+def _get_pipeline_client():
+    """
+    Return the cached Vertex AI PipelineServiceClient, initializing the
+    Vertex AI SDK on first use.
+    """
+    global _pipeline_client
+
+    if _pipeline_client is None:
+        with _client_lock:
+            if _pipeline_client is None:
+                logging.info('Initializing Vertex AI...')
+
+                aiplatform.init(project=PROJECT_ID, location=REGION)
+
+                _pipeline_client = aiplatform.gapic.PipelineServiceClient(
+                    client_options={
+                        'api_endpoint': f'{REGION}-aiplatform.googleapis.com'
+                    }
+                )
+
+    return _pipeline_client
+
+
+def _get_storage_client():
+    """
+    Return the cached GCS client used to read the pipeline template.
+    """
+    global _storage_client
+
+    if _storage_client is None:
+        with _client_lock:
+            if _storage_client is None:
+                _storage_client = storage.Client(project=PROJECT_ID)
+
+    return _storage_client
+
+
+def _load_pipeline_spec(template_path):
+    """
+    Download the compiled pipeline template from GCS.
+
+    Args:
+        template_path (str): gs:// URI of the compiled pipeline JSON
+    Returns:
+        dict: The pipeline spec
+    """
+    bucket_name, blob_name = template_path[5:].split('/', 1)
+
+    blob = _get_storage_client().bucket(bucket_name).blob(blob_name)
+    pipeline_json = json.loads(blob.download_as_bytes())
+
+    # Templates may be either a bare pipeline spec or a full pipeline job
+    return pipeline_json.get('pipelineSpec', pipeline_json)
+
+
+def _create_pipeline_job(parameters):
+    """
+    Submit the pipeline job and return as soon as it is accepted - the
+    function does not wait on (or poll) the pipeline run.
+
+    Args:
+        parameters (dict): Pipeline parameters, merged over the defaults
+    Returns:
+        str: The created pipeline job resource name
+    """
+    client = _get_pipeline_client()
+
+    logging.info('Triggering pipeline...')
+
+    # Define pipeline and set the destination of the pipeline template
+    pipeline_job = aiplatform.gapic.PipelineJob(
+        display_name=DISPLAY_NAME,
+        pipeline_spec=_load_pipeline_spec(TEMPLATE_PATH),
+        runtime_config=aiplatform.gapic.PipelineJob.RuntimeConfig(
+            gcs_output_directory=PIPELINE_ROOT,
+            parameter_values={**PARAMETER_VALUES, **parameters},
+        ),
+    )
+
+    logging.info('Run pipeline.')
+
+    job = client.create_pipeline_job(
+        parent=f'projects/{PROJECT_ID}/locations/{REGION}',
+        pipeline_job=pipeline_job,
+    )
+
+    logging.info(f'Pipeline job created: {job.name}')
+
+    return job.name
+
+
+def handle(request):
+    """
+    HTTP trigger - start the Vertex AI pipeline with the request
+    parameters.
+    """
+    # Parse the request payload (JSON)
+    parameters = {}
+
+    try:
+        request_json = request.get_json(silent=True)
+        logging.debug('handle request.json: %s', request_json)
+        if request_json and 'parameters' in request_json:
+            parameters = request_json['parameters']
+    except Exception as e:
+        logging.error(f'Error: {str(e.with_traceback(None))}')
+        return f'Error parsing request payload: {str(e)}', 400
+
+    try:
+        job_name = _create_pipeline_job(parameters)
+    except Exception as e:
+        logging.exception(
+            'An error occurred while running the AI platform pipeline.')
+        return f'AI platform error: {str(e)}', 400
+
+    return f'Pipeline triggered successfully: {job_name}', 200
+
+
+def handle_event(event, context):
+    """
+    Background trigger (e.g. retraining notification) - start the Vertex
+    AI pipeline with the default parameters.
+    """
+    return _create_pipeline_job({})
@@ -1,13 +1,56 @@
 """
-This module prepares (preprocessing) the dataset for model training
+This module prepares (preprocessing) the dataset for model inference
 
 We define here the different characteristics of the dataset we want to
 provde to the model.
 
+The inference path works on NumPy arrays only - the features arrive as a
+2D array of survey codes in FEATURES order and the composite features are
+computed column-wise on that array.
 """
 
+import numpy as np
+
 TARGET = 'ment14d'
 
+# Survey codes range up to 999 (alcday4), so int16 is the narrowest dtype
+# that holds every feature value
+FEATURE_DTYPE = np.int16
+
+# Feature names in the order the model expects them
+FEATURES = [
+    'poorhlth', 'physhlth', 'genhlth', 'diffwalk', 'diffalon',
+    'checkup1', 'diffdres', 'addepev3', 'acedeprs', 'sdlonely', 'lsatisfy',
+    'emtsuprt', 'decide', 'cdsocia1', 'cddiscu1', 'cimemlo1', 'smokday2',
+    'alcday4', 'marijan1', 'exeroft1', 'usenow3', 'firearm5', 'income3',
+    'educa', 'employ1', 'sex', 'marital', 'adult', 'rrclass3', 'qstlang',
+    'state', 'veteran3', 'medcost1', 'sdhbills', 'sdhemply', 'sdhfood1',
+    'sdhstre1', 'sdhutils', 'sdhtrnsp', 'cdhous1', 'foodstmp', 'pregnant',
+    'asthnow', 'havarth4', 'chcscnc1', 'chcocnc1', 'diabete4', 'chccopd3',
+    'cholchk3', 'bpmeds1', 'bphigh6', 'cvdstrk3', 'cvdcrhd4', 'chckdny2',
+    'cholmed3'
+]
+
+# Composite features, appended after FEATURES in this order (as in training)
+COMPOSITE_FEATURES = [
+    'Physical_Mental_Interaction',
+    'Income_Education_Interaction',
+    'Mental_Health_Composite',
+]
+
+# Number of raw input features, and of model features (composites included)
+N_FEATURES = len(FEATURES)
+MODEL_FEATURES = N_FEATURES + len(COMPOSITE_FEATURES)
+
+# Column indices of the composite feature inputs
+GENHLTH_IDX = FEATURES.index('genhlth')
+PHYSHLTH_IDX = FEATURES.index('physhlth')
+INCOME3_IDX = FEATURES.index('income3')
+EDUCA_IDX = FEATURES.index('educa')
+EMTSUPRT_IDX = FEATURES.index('emtsuprt')
+ADDEPEV3_IDX = FEATURES.index('addepev3')
+POORHLTH_IDX = FEATURES.index('poorhlth')
+
 
 class MentalHealthData():
     """
@@ -16,63 +59,67 @@ class MentalHealthData():
 
     Attributes:
       target (str): target variable
-      categorical_features (list): list of categorical features
+      feature_names (list): model feature names, composites included
     """
 
-    def __init__(self, df):
+    def __init__(self, arr, out=None):
         """
         Initialize the dataset and define the dataset characteristics
 
+        Args:
+          arr (np.ndarray): features, one row per instance, in FEATURES order
+          out (np.ndarray): optional float32 buffer of MODEL_FEATURES columns
+            to write the model features into; used when it has enough rows
+
         Task:
           - Load and prepare the dataset
           - Define the dataset characteristics
         """
 
-        # 1. Make a copy of the dataset
-        self._df = df.copy()
-
-        # Integrate composite features
-        self._integrate_composite_features()
+        # 1. Integrate composite features
+        self._x = self._integrate_composite_features(arr, out)
 
         # 2. Define the target variable
         self.target = TARGET
 
-        # Define the feature groups
-
-        # 3. Numeric features need scaler
-        continuous_features = ['physhlth', 'poorhlth', 'marijan1']
-        aggregated_features = [
-            'Mental_Health_Composite',
-            'Income_Education_Interaction',
-            'Physical_Mental_Interaction',
-        ]
-        non_categorical_features = continuous_features + aggregated_features
-
-        # 4. Categorical features
-        self.categorical_features = [
-            col for col in self._df.columns
-            if col not in (non_categorical_features + [self.target])
-        ]
+        # 3. Define the model features
+        self.feature_names = FEATURES + COMPOSITE_FEATURES
 
     def get_data(self):
         """
         Return the dataset
 
         Returns:
-          pd.DataFrame: dataset
+          np.ndarray: features followed by the composite features
         """
-        return self._df
+        return self._x
+
+    @staticmethod
+    def _integrate_composite_features(arr, out=None):
+        n = len(arr)
+
+        # Write into the caller's buffer when it fits, otherwise allocate.
+        # A leading row slice of a C-contiguous buffer stays C-contiguous.
+        if out is not None and len(out) >= n:
+            x = out[:n]
+        else:
+            x = np.empty((n, MODEL_FEATURES), dtype=np.float32)
+
+        # Single float32 conversion - the dtype the model predicts on.
+        # Products are taken in float32 so they cannot overflow int16.
+        x[:, :N_FEATURES] = arr
 
-    def _integrate_composite_features(self):
-        # Create a new copy of the cleaned dataset
-        mental_health_features = ['emtsuprt', 'addepev3', 'poorhlth']
         # Using Nonlinear interaction
-        self._df['Physical_Mental_Interaction'] = self._df['genhlth'].astype(
-            int) * self._df['physhlth']
+        np.multiply(x[:, GENHLTH_IDX], x[:, PHYSHLTH_IDX], out=x[:, N_FEATURES])
         # Income and Education Interaction
-        self._df['Income_Education_Interaction'] = self._df['income3'].astype(
-            int) * self._df['educa'].astype(int)
-        # Mental Health
-        self._df['Mental_Health_Composite'] = self._df[
-            mental_health_features
-        ].mean(axis=1)
+        np.multiply(
+            x[:, INCOME3_IDX], x[:, EDUCA_IDX], out=x[:, N_FEATURES + 1])
+        # Mental Health - mean of the three columns, summed in place rather
+        # than through a fancy-indexed (n, 3) copy. Divide (do not multiply
+        # by 1/3) so the result rounds like the mean taken at training time.
+        mental_health = x[:, N_FEATURES + 2]
+        np.add(x[:, EMTSUPRT_IDX], x[:, ADDEPEV3_IDX], out=mental_health)
+        mental_health += x[:, POORHLTH_IDX]
+        mental_health /= 3
+
+        return x
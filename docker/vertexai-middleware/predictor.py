@@ -25,25 +25,35 @@ Runs on Uvicorn to manage concurrent requests.
 
 import os
 import time
-import joblib
+import asyncio
 import logging
+import operator
+import threading
 import uvicorn
 from typing import List
+from collections import OrderedDict
 
-import pandas as pd
+import orjson
+import numpy as np
+import pyarrow as pa
 import xgboost as xgb
 from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from google.cloud import storage
+from google.api_core.exceptions import NotFound
 
-from ml_inference_data import MentalHealthData
+from ml_inference_data import (
+    MentalHealthData, FEATURES, FEATURE_DTYPE, MODEL_FEATURES)
 
 # Create a FastAPI app
 app = FastAPI()
 
 # The trained model object - initialized to None
-# Load on first request
+# Loaded at startup (see _preload_model), or on first request when
+# PRELOAD_MODEL is disabled
 xgb_model = None
+# Guards the one-time model load only - inference runs without the lock
+model_lock = threading.Lock()
 
 # Enable logging
 logging.basicConfig(level=logging.INFO, force=True)
@@ -51,22 +61,33 @@ logger = logging.getLogger(__name__)
 
 app.logger = logger
 
+
+def _json_response(content, status_code=status.HTTP_200_OK):
+    """
+    Serialize the response body with orjson instead of the stdlib json
+    encoder used by JSONResponse.
+    """
+    return Response(
+        content=orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY),
+        status_code=status_code,
+        media_type='application/json'
+    )
+
 # ---------------------------------------------------
 # Define feature names and expected order of features
 # ---------------------------------------------------
 
-EXPECTED_FEATURE_ORDER = [
-    'poorhlth', 'physhlth', 'genhlth', 'diffwalk', 'diffalon',
-    'checkup1', 'diffdres', 'addepev3', 'acedeprs', 'sdlonely', 'lsatisfy',
-    'emtsuprt', 'decide', 'cdsocia1', 'cddiscu1', 'cimemlo1', 'smokday2',
-    'alcday4', 'marijan1', 'exeroft1', 'usenow3', 'firearm5', 'income3',
-    'educa', 'employ1', 'sex', 'marital', 'adult', 'rrclass3', 'qstlang',
-    'state', 'veteran3', 'medcost1', 'sdhbills', 'sdhemply', 'sdhfood1',
-    'sdhstre1', 'sdhutils', 'sdhtrnsp', 'cdhous1', 'foodstmp', 'pregnant',
-    'asthnow', 'havarth4', 'chcscnc1', 'chcocnc1', 'diabete4', 'chccopd3',
-    'cholchk3', 'bpmeds1', 'bphigh6', 'cvdstrk3', 'cvdcrhd4', 'chckdny2',
-    'cholmed3'
-]
+# See ml_inference_data.FEATURES
+EXPECTED_FEATURE_ORDER = FEATURES
+
+# Set of the expected feature names for O(1) payload validation
+EXPECTED_FEATURES = frozenset(EXPECTED_FEATURE_ORDER)
+
+# Content type of Arrow IPC stream payloads, see _read_arrow_features
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Reads a row's feature values, in model order, as a tuple in one C call
+_get_features = operator.itemgetter(*EXPECTED_FEATURE_ORDER)
 
 # -----------------------------
 # Define preprocessing function
@@ -74,20 +95,48 @@ EXPECTED_FEATURE_ORDER = [
 
 # Fallback model URI, AIP_STORAGE_URI is not set (Why - ask Google)
 GCS_MODEL_PATH = os.getenv('AIP_STORAGE_URI')
+# Model file name written by the register step (see register_model)
+MODEL_FILENAME = 'model.ubj'
+# Threads per predict call. Batches are small and Uvicorn already runs one
+# worker per CPU, so a single thread avoids OpenMP fan-out on every request.
+PREDICT_NTHREAD = int(os.getenv('PREDICT_NTHREAD', '1'))
+
+# GCS client - created once and reused by every (re)load
+_storage_client = None
+
+
+def _get_storage():
+    """
+    Return the shared GCS client, creating it on first use.
+    """
+    global _storage_client
+
+    if _storage_client is None:
+        _storage_client = storage.Client()
+
+    return _storage_client
 
 
 def _load_model():
     """
     Load the trained model from the model artifact in the container.
-    Loads the trained model from the environment variable AIP_MODEL_DIR which
-    is set in the Vertex AI registration step.
+    Loads the trained model from the GCS path in the environment variable
+    AIP_STORAGE_URI, which Vertex AI sets from the artifact_uri given in the
+    registration step.
     """
     global xgb_model
     global GCS_MODEL_PATH
 
     MODEL_URI = 'gs://mlops-gcs-bucket/models/xgb-model/'
 
-    if xgb_model is None:
+    # Double-checked locking: the lock is only taken until the model is set
+    if xgb_model is not None:
+        return xgb_model
+
+    with model_lock:
+        if xgb_model is not None:
+            return xgb_model
+
         if not GCS_MODEL_PATH:
             logger.info('AIP_STORAGE_URI environment variable not set.')
             logger.info(f'Loading model from {MODEL_URI}...')
@@ -100,30 +149,51 @@ def _load_model():
 
         logger.info(f'Setting bucket name: {bucket_name}...')
 
-        # Initialize GCS client
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
+        # Get the shared GCS client
+        bucket = _get_storage().bucket(bucket_name)
+
+        # Fetch the model by its canonical name. Only list the bucket if
+        # the artifact was stored under another name.
+        model_blob = bucket.blob(os.path.join(prefix, MODEL_FILENAME))
 
-        # List all blobs in the bucket
-        blobs = list(bucket.list_blobs(prefix=prefix))
+        try:
+            model_bytes = model_blob.download_as_bytes()
+        except NotFound:
+            logger.info(
+                f'{model_blob.name} not found. Searching {prefix} for a model...')
 
-        if not blobs:
-            raise ValueError('No files found in the bucket.')
+            # Find the model file with the correct extension
+            # UBJSON (XGBoost native binary) is our model file extension
+            model_blob = next(iter(bucket.list_blobs(
+                prefix=prefix, match_glob='**.ubj', max_results=1)), None)
 
-        # Find the model file with the correct extension
-        exts = ['.joblib']  # joblib is our model file extension
-        model_blob = next(
-            (b for b in blobs if b.name.endswith(tuple(exts))), None)
+            if not model_blob:
+                raise ValueError('No model file found in the bucket.')
 
-        if not model_blob:
-            raise ValueError('No model file found in the bucket.')
+            model_bytes = model_blob.download_as_bytes()
 
-        # Download the model file to /tmp
-        model_path = os.path.join('/tmp', os.path.basename(model_blob.name))
-        model_blob.download_to_filename(model_path)
+        # The model is downloaded straight into memory - no /tmp round trip
+        # (/tmp is a tmpfs in the container and counts against memory)
 
         # Load the model
-        xgb_model = joblib.load(model_path)
+        booster = xgb.Booster()
+        booster.load_model(bytearray(model_bytes))
+
+        # The model holds no trees past its best round - the train
+        # component trains the final model for exactly the rounds the best
+        # candidate early-stopped at, so no trim is needed here
+
+        booster.set_param({'nthread': PREDICT_NTHREAD})
+
+        # Warm up with a dummy row through the full preprocess and predict
+        # path, so the first request does not pay for XGBoost's lazy
+        # predictor/thread pool setup or NumPy's first-call code paths.
+        # Runs before /health reports the model as loaded.
+        _predict(_preprocess_input(
+            np.zeros((1, len(EXPECTED_FEATURE_ORDER)), dtype=FEATURE_DTYPE)),
+            booster)
+
+        xgb_model = booster
 
     return xgb_model
 
@@ -136,33 +206,352 @@ def _predict(mh: MentalHealthData, model):
     Returns:
         np.array: The model prediction.
     """
-    # XGb expects data in DMatrix format
     # mh.get_data() passes in the predictors in the correct order
+    if isinstance(model, xgb.Booster):
+        # Predict directly on a dense float32 array - skips the per-request
+        # DMatrix allocation and copy (no-op conversion, get_data() is
+        # already C-contiguous float32)
+        features = np.ascontiguousarray(mh.get_data(), dtype=np.float32)
+        return model.inplace_predict(features)
+
+    # Other model types expect data in DMatrix format
     xgb_features = xgb.DMatrix(mh.get_data())
 
     # Make predictions
     return model.predict(xgb_features)
 
 
-def _preprocess_input(data: List):
+def _to_feature_array(data: List):
     """
-    Preprocess incoming inference data by applying necessary transformations.
+    Convert incoming inference rows to a feature array.
+    Args:
+        data (list): The input JSON rows containing feature values.
+    Returns:
+        np.array: int16 feature array in the expected model order.
+    """
+    # Read the feature values straight into an int array, already in the
+    # expected model order - no per-column DataFrame construction, dtype
+    # coercion or name-based reindex. itemgetter does the per-row lookups
+    # in C instead of a nested Python comprehension.
+    # Survey codes are small ints, but do not all fit in int8 (e.g.
+    # alcday4 goes up to 999) - int16 is the narrowest safe type.
+    return np.array([_get_features(row) for row in data], dtype=FEATURE_DTYPE)
+
+
+def _read_json_features(body: bytes):
+    """
+    Parse and validate a JSON prediction payload.
     Args:
-        data (dict): The input JSON data containing feature values.
+        body (bytes): The request body - {"features": {...}} for a single
+            instance, or {"instances": [{...}, ...]} for a batch.
     Returns:
-        np.array: Transformed feature array for model prediction.
+        np.array: int16 feature array in the expected model order.
+    Raises:
+        HTTPException: 400 if the payload is missing, malformed or invalid.
     """
-    # Convert the input data to a pandas DataFrame
-    _df = pd.DataFrame(data).astype(int)
-    # Reorder the features to match the expected model order
-    df = _df[EXPECTED_FEATURE_ORDER]
+    # Parse JSON body - orjson decodes much faster than stdlib json
+    try:
+        input_data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        logger.error('Malformed JSON payload.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed JSON payload."
+        )
+
+    # Validate input
+    if not input_data:
+        logger.error('No input data provided.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No input data provided."
+        )
+
+    # The payload must be an object holding the features or instances
+    if not isinstance(input_data, dict):
+        logger.error('Invalid input data format.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input data format."
+        )
 
+    # Single instance prediction
+    if "features" in input_data:
+        input_data = [input_data["features"]]
+    # Batch prediction
+    elif "instances" in input_data:
+        input_data = input_data["instances"]
+    else:
+        logger.error('Invalid input data format.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input data format."
+        )
+
+    # Validate every row before any preprocessing work is done
+    if (
+        not isinstance(input_data, list) or not input_data
+        or any(
+            not isinstance(row, dict)
+            or row.keys() != EXPECTED_FEATURES
+            for row in input_data
+        )
+    ):
+        logger.error('Invalid number of parameters.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid number of parameters."
+        )
+
+    # Preprocess input
+    try:
+        return _to_feature_array(input_data)
+    except (TypeError, ValueError, OverflowError):
+        logger.error('Invalid feature values.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid feature values."
+        )
+
+
+def _read_arrow_features(body: bytes):
+    """
+    Parse and validate an Arrow IPC stream prediction payload, one column
+    per feature. Columns are cast straight into the feature array - no
+    JSON decoding or per-row dicts.
+    Args:
+        body (bytes): The request body, an Arrow IPC stream.
+    Returns:
+        np.array: int16 feature array in the expected model order.
+    Raises:
+        HTTPException: 400 if the payload is missing, malformed or invalid.
+    """
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowException:
+        logger.error('Invalid input data format.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input data format."
+        )
+
+    if (
+        table.num_rows == 0
+        or table.num_columns != len(EXPECTED_FEATURES)
+        or set(table.column_names) != EXPECTED_FEATURES
+    ):
+        logger.error('Invalid number of parameters.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid number of parameters."
+        )
+
+    features = np.empty(
+        (table.num_rows, len(EXPECTED_FEATURE_ORDER)), dtype=FEATURE_DTYPE)
+
+    try:
+        for i, name in enumerate(EXPECTED_FEATURE_ORDER):
+            column = table.column(name)
+            if column.null_count or not pa.types.is_integer(column.type):
+                raise TypeError(f'{name} must be a non-null integer column')
+            # Safe cast - out of range values raise instead of wrapping
+            features[:, i] = column.cast(pa.int16()).to_numpy()
+    except (TypeError, pa.ArrowException):
+        logger.error('Invalid feature values.')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid feature values."
+        )
+
+    return features
+
+
+def _preprocess_input(arr: np.ndarray, out: np.ndarray = None):
+    """
+    Preprocess incoming inference data by applying necessary transformations.
+    Args:
+        arr (np.array): The feature array, see _to_feature_array.
+        out (np.array): Optional float32 buffer to write the features into.
+    Returns:
+        MentalHealthData: Transformed features for model prediction.
+    """
     # Prepare our inference data
-    # MentalHealthData can process both feature with target data,
-    # or just feature data, including composite features
-    # In this case, we are only interested in the feature and composite
-    # data
-    return MentalHealthData(df)
+    # MentalHealthData appends the composite features to the feature
+    # array with NumPy column arithmetic - no pandas on the request path
+    return MentalHealthData(arr, out)
+
+
+# ------------------------------------------------------------
+# Micro-batching - concurrent requests share one predict call
+# ------------------------------------------------------------
+
+# Max rows per batched predict call
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '32'))
+# Max time (ms) a request waits for others to join its batch
+FLUSH_MS = float(os.getenv('FLUSH_MS', '5'))
+# Max time (s) a request waits for its batch to be predicted
+PREDICT_TIMEOUT_S = float(os.getenv('PREDICT_TIMEOUT_S', '30'))
+
+# Pending (features, future) pairs - created on app startup
+_batch_queue = None
+
+# Model input buffer, reused by every batch. Only the batch worker writes
+# to it, and it waits for each prediction before building the next batch.
+# Larger batches (a single oversized request) fall back to a fresh array.
+_feature_buffer = np.empty((BATCH_SIZE, MODEL_FEATURES), dtype=np.float32)
+
+# Max number of rows in the prediction cache (0 disables it)
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '16384'))
+
+# LRU cache of per-row predictions, keyed by the raw int16 feature row.
+# Only touched by the batch worker on the event loop - no lock needed. The
+# model is loaded once per process, so entries never go stale.
+_prediction_cache = OrderedDict()
+_cache_hits = 0
+_cache_misses = 0
+
+
+def _cache_lookup(features: np.ndarray):
+    """
+    Look up each feature row in the prediction cache.
+    Returns:
+        tuple: the row keys, and the cached prediction (or None) per row.
+    """
+    keys = [row.tobytes() for row in features]
+    cached = []
+
+    for key in keys:
+        prediction = _prediction_cache.get(key)
+        if prediction is not None:
+            _prediction_cache.move_to_end(key)
+        cached.append(prediction)
+
+    return keys, cached
+
+
+def _cache_store(keys: List, predictions: np.ndarray):
+    """
+    Add predictions to the cache, evicting the least recently used rows.
+    """
+    for key, prediction in zip(keys, predictions):
+        # Copy - do not keep the whole batch result alive through a view
+        _prediction_cache[key] = prediction.copy()
+
+    while len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+        _prediction_cache.popitem(last=False)
+
+
+async def _predict_batch(features: np.ndarray):
+    """
+    Predict a batch of feature rows. Rows seen before are served from the
+    prediction cache, only the misses are sent to the model.
+    """
+    global _cache_hits, _cache_misses
+
+    if PREDICTION_CACHE_SIZE > 0:
+        keys, cached = _cache_lookup(features)
+        misses = [i for i, p in enumerate(cached) if p is None]
+    else:
+        keys, cached, misses = None, None, range(len(features))
+
+    _cache_hits += len(features) - len(misses)
+    _cache_misses += len(misses)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Prediction cache hit rate: %.3f',
+                     _cache_hits / max(1, _cache_hits + _cache_misses))
+
+    if not misses:
+        return np.stack(cached)
+
+    all_missed = len(misses) == len(features)
+    processed_data = _preprocess_input(
+        features if all_missed else features[misses], _feature_buffer)
+
+    # Load the model, if not preloaded - off the event loop so a
+    # lazy load does not stall every other request
+    model = xgb_model
+    if model is None:
+        model = await asyncio.to_thread(_load_model)
+    # Inference is CPU-bound - run it in a worker thread so the
+    # event loop keeps accepting requests meanwhile.
+    predictions = await asyncio.to_thread(_predict, processed_data, model)
+
+    if PREDICTION_CACHE_SIZE > 0:
+        _cache_store(keys if all_missed else [keys[i] for i in misses],
+                     predictions)
+
+    if all_missed:
+        return predictions
+
+    # Put the model predictions back in place, in the original row order
+    for i, prediction in zip(misses, predictions):
+        cached[i] = prediction
+
+    return np.stack(cached)
+
+
+async def _batch_worker():
+    """
+    Drain the request queue into batches of up to BATCH_SIZE rows, or
+    whatever arrived within FLUSH_MS, then run a single prediction for the
+    batch and hand each caller its own rows of the result.
+    """
+    loop = asyncio.get_running_loop()
+
+    while True:
+        batch = [await _batch_queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = loop.time() + FLUSH_MS / 1000
+
+        while n_rows < BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_batch_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+
+        try:
+            predictions = await _predict_batch(
+                np.concatenate([features for features, _ in batch]))
+
+            start = 0
+            for features, future in batch:
+                end = start + len(features)
+                if not future.done():
+                    future.set_result(predictions[start:end])
+                start = end
+
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+async def _batched_predict(features: np.ndarray):
+    """
+    Queue the features for the next batch and wait for their predictions.
+    Raises asyncio.TimeoutError after PREDICT_TIMEOUT_S, so a stalled batch
+    cannot hold the request open indefinitely.
+    """
+    future = asyncio.get_running_loop().create_future()
+    await _batch_queue.put((features, future))
+
+    # On timeout the future is cancelled - the worker skips done futures
+    return await asyncio.wait_for(future, PREDICT_TIMEOUT_S)
+
+
+@app.on_event('startup')
+async def _start_batch_worker():
+    global _batch_queue
+
+    _batch_queue = asyncio.Queue()
+    # Keep a reference so the task is not garbage collected
+    app.state.batch_worker = asyncio.create_task(_batch_worker())
 
 
 # ----------------------------------------------------------------
@@ -171,6 +560,39 @@ def _preprocess_input(data: List):
 # ----------------------------------------------------------------
 
 
+# Load the model before the container reports healthy, so the first
+# prediction does not pay for the model download. Set PRELOAD_MODEL=false
+# to skip (e.g. when running the app without GCS access).
+PRELOAD_MODEL = os.getenv('PRELOAD_MODEL', 'true').lower() == 'true'
+
+# The model load retry started by /health, while one is in flight
+_model_load_task = None
+
+
+async def _try_load_model():
+    """
+    Load the model, logging (not raising) a failure.
+    """
+    try:
+        # GCS download + deserialize - keep it off the event loop
+        await asyncio.to_thread(_load_model)
+    except Exception as e:
+        logger.exception(f'Failed to load the model: {e}')
+
+
+@app.on_event('startup')
+async def _preload_model():
+    """
+    Load the model when the app starts. A failed load is logged and retried
+    in the background by the next /health call, which keeps reporting
+    unavailable until the model is loaded.
+    """
+    if not PRELOAD_MODEL:
+        return
+
+    await _try_load_model()
+
+
 @app.get('/')
 @app.get('/healthz')
 @app.get('/health')
@@ -178,9 +600,27 @@ async def health_check():
     """
     Define a health check endpoint for the container.
     This is a required endpoint for Vertex AI custom containers.
+    Returns 503 until the model is loaded so Vertex AI does not route
+    traffic to a replica that cannot serve predictions yet, and retries
+    a failed model load meanwhile.
     """
+    global _model_load_task
+
+    if xgb_model is None and PRELOAD_MODEL:
+        logger.info('Health check endpoint called. Model not loaded yet.')
+
+        # The preload failed - retry it in the background (one load at a
+        # time), as no traffic reaches the worker until it is healthy
+        if _model_load_task is None or _model_load_task.done():
+            _model_load_task = asyncio.create_task(_try_load_model())
+
+        return _json_response(
+            content={"status": "loading"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
     logger.info('Health check endpoint called. Returning 200 OK.')
-    return JSONResponse(content={"status": "healthy"}, status_code=status.HTTP_200_OK)
+    return _json_response(content={"status": "healthy"}, status_code=status.HTTP_200_OK)
 
 
 @app.post('/predict')
@@ -191,6 +631,8 @@ async def predict(request: Request):
     Handles incoming prediction requests and returns model inference results.
     Args:
         request: The incoming request object.
+    Accepts JSON, or an Arrow IPC stream with Content-Type
+    application/vnd.apache.arrow.stream (one column per feature).
     Steps:
         1. Parse the request payload
         2. Preprocess the input data
@@ -201,58 +643,43 @@ async def predict(request: Request):
     """
     try:
         logger.info('Predict endpoint called.')
-        # Parse JSON body
-        input_data = await request.json()
-
-        # Validate input
-        if not input_data:
-            logger.error('No input data provided.')
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No input data provided."
-            )
+        body = await request.body()
 
-        # Single instance prediction
-        if "features" in input_data:
-            input_data = [input_data["features"]]
-        # Batch prediction
-        elif "instances" in input_data:
-            input_data = input_data["instances"]
+        # Read the features - from an Arrow IPC stream (e.g. sent through
+        # rawPredict), or from the JSON instances
+        content_type = request.headers.get('content-type', '')
+        if content_type.split(';')[0].strip() == ARROW_STREAM_TYPE:
+            features = _read_arrow_features(body)
         else:
-            logger.error('Invalid input data format.')
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid input data format."
-            )
+            features = _read_json_features(body)
 
-        if len(input_data[0]) != 55:
-            logger.error('Invalid number of parameters.')
+        # Make prediction - batched together with concurrent requests
+        logger.info('Making prediction...')
+        try:
+            predictions = await _batched_predict(features)
+        except asyncio.TimeoutError:
+            logger.error('Prediction timed out.')
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid number of parameters."
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Prediction timed out."
             )
 
-        # Preprocess input
-        processed_data = _preprocess_input(input_data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Predictions: %s', predictions)
 
-        # Make prediction
-
-        # Load the model
-        model = _load_model()
-        # Predict!
-        logger.info('Making prediction...')
-        predictions = _predict(processed_data, model)
-
-        logger.debug(f'Predictions: {predictions}')
-
-        # Return response
-        return JSONResponse(content={
+        # Return response - orjson serializes the (C-contiguous) prediction
+        # array directly, no intermediate Python list
+        return _json_response(content={
             'success': True,
-            'prediction': predictions.tolist()
+            'prediction': predictions
         })
 
+    except HTTPException:
+        # Payload errors - already logged, returned as is
+        raise
+
     except Exception as e:
-        logger.exception(f'An error occurred: {e}')
+        logger.exception('An error occurred: %s', e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Server error occurred."
@@ -264,7 +691,17 @@ async def predict(request: Request):
 # -------------------
 
 if __name__ == '__main__':
-    # Load the model singleton
-    _load_model()
+    # The model is loaded by the app's startup hook
     # Vertex AI custom containers require the app to listen on port 8080
-    uvicorn.run("predictor:app", host='0.0.0.0', port=8080, log_level='debug')
+    # One worker process per CPU - each worker loads its own model in the
+    # startup hook, after the fork
+    uvicorn.run(
+        "predictor:app",
+        host='0.0.0.0',
+        port=8080,
+        workers=max(1, os.cpu_count() or 1),
+        loop='uvloop',
+        http='httptools',
+        timeout_keep_alive=65,
+        log_level='info'
+    )
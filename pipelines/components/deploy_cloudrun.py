@@ -1,16 +1,20 @@
 from kfp.dsl import component, Input, Artifact
 
+from components.images import component_image
 
-@component(
-    base_image='python:3.12',
+
+@component(**component_image(
+    'mh-deploy-run',
     packages_to_install=['google-cloud-run'],
-)
+))
 def deploy_model(
     project_id: str,
     region: str,
     endpoint_name: str,
     container_image_uri: str,
     model_resource: Input[Artifact],
+    min_instance_count: int = 0,
+    max_instance_count: int = 2,
 ) -> bool:
     """
     Deploy the trained model to Vertex AI.
@@ -21,6 +25,8 @@ def deploy_model(
         - endpoint_name: str, the endpoint name
         - container_image_uri: str, the container image URI
         - model_resource: Input[Artifact], the model resource
+        - min_instance_count: int, min instances - 0 scales to zero when idle
+        - max_instance_count: int, max instances
 
     Returns:
         - bool: True if the model is successfully deployed, False otherwise
@@ -53,61 +59,61 @@ def deploy_model(
     vpc_connector_name = 'gke-cloudrun-connector'
     vpc_connector = f'projects/{project_id}/locations/{region}/connectors/{vpc_connector_name}'
 
-    logger.info(f'Creating service: {service_path}')
-
-    try:
-        # Check if service already exists
-        service = client.get_service(name=service_path)
-
-        logger.info(
-            f'Cloud Run service "{endpoint_name}" exists. Updating...')
-
-        # Update the existing service
-        service.template.containers[0].image = container_image_uri
-
-        # Add VPC connector
-        service.template.vpc_access = run_v2.VpcAccess(
-            connector=vpc_connector,
-            egress=run_v2.VpcAccess.VpcEgress.ALL_TRAFFIC
-        )
-
-        # Update the service
-        operation = client.update_service(
-            service=service,
-            update_mask={
-                'paths': ['template']
-            }
-        )
-
-    except Exception as e:
-        logger.warning('Cloud Run service does not exist. Creating...')
-
-        # Define the Cloud Run Service configuration
-        service = run_v2.Service(
-            template=run_v2.RevisionTemplate(
-                containers=[
-                    run_v2.Container(
-                        image=container_image_uri,  # Model container
-                        resources=run_v2.ResourceRequirements(
-                            limits={'memory': '2Gi', 'cpu': '4'}
-                        )
-                    )
-                ],
-                vpc_access=run_v2.VpcAccess(  # Attach VPC connector
-                    connector=vpc_connector,
-                    egress=run_v2.VpcAccess.VpcEgress.ALL_TRAFFIC
+    # Scale to zero when idle (min_instance_count=0), so no instance is
+    # kept running between prediction bursts
+    scaling = run_v2.RevisionScaling(
+        min_instance_count=min_instance_count,
+        max_instance_count=max_instance_count,
+    )
+
+    # Route traffic to a new instance only once the model is loaded -
+    # /health returns 503 until then
+    startup_probe = run_v2.Probe(
+        http_get=run_v2.HTTPGetAction(path='/health'),
+        period_seconds=5,
+        timeout_seconds=5,
+        failure_threshold=24,
+    )
+
+    logger.info(f'Deploying service: {service_path}')
+
+    # Define the Cloud Run Service configuration
+    service = run_v2.Service(
+        name=service_path,
+        template=run_v2.RevisionTemplate(
+            containers=[
+                run_v2.Container(
+                    image=container_image_uri,  # Model container
+                    resources=run_v2.ResourceRequirements(
+                        limits={'memory': '2Gi', 'cpu': '4'},
+                        # Only allocate CPU while requests are processed
+                        cpu_idle=True,
+                        # Extra CPU while the instance starts
+                        startup_cpu_boost=True,
+                    ),
+                    startup_probe=startup_probe,
                 )
-            ),
-        )
-        # Create new service
-        operation = client.create_service(
-            parent=parent_path,
+            ],
+            scaling=scaling,
+            vpc_access=run_v2.VpcAccess(  # Attach VPC connector
+                connector=vpc_connector,
+                egress=run_v2.VpcAccess.VpcEgress.ALL_TRAFFIC
+            )
+        ),
+    )
+
+    # Create the service, or update it if it already exists, in a single
+    # call (allow_missing) - no get_service round trip beforehand
+    operation = client.update_service(
+        request=run_v2.UpdateServiceRequest(
             service=service,
-            service_id=endpoint_name
+            allow_missing=True,
         )
+    )
 
-    # Wait for the operation to complete
-    response = operation.result()
+    # Wait for the operation to complete - bounded, so a stuck rollout
+    # fails the step instead of holding it until the pipeline times out
+    response = operation.result(timeout=600)
 
     if response:
         cloud_run_url = response.uri
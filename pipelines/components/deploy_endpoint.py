@@ -1,15 +1,20 @@
 from kfp.dsl import component, Input, Artifact
 
+from components.images import component_image
 
-@component(
-    base_image='python:3.12',
+
+@component(**component_image(
+    'mh-deploy-vertex',
     packages_to_install=['google-cloud-aiplatform'],
-)
+))
 def deploy_model(
     project_id: str,
     region: str,
     endpoint_name: str,
     model_resource: Input[Artifact],
+    machine_type: str = 'n1-standard-4',
+    min_replica_count: int = 1,
+    max_replica_count: int = 2,
 ) -> bool:
     """
     Deploy the trained model to Vertex AI.
@@ -18,6 +23,9 @@ def deploy_model(
         - project_id: str, the project id
         - region: str, the region
         - model_resource: Input[Artifact], the model resource
+        - machine_type: str, the machine type of the serving replicas
+        - min_replica_count: int, min serving replicas
+        - max_replica_count: int, max serving replicas
 
     Returns:
         - bool: True if the model is successfully deployed, False otherwise
@@ -39,12 +47,25 @@ def deploy_model(
 
     logger.info(f'Getting the Endpoint object from {endpoint_name}')
 
-    # List existing endpoints
-    endpoints = aiplatform.Endpoint.list(
-        filter=f'display_name="{endpoint_name}"')
+    # Look up the newest endpoint with a matching display name.
+    # The filter and ordering run server-side and only the first page
+    # (a single endpoint) is fetched.
+    endpoint_client = aiplatform.gapic.EndpointServiceClient(
+        client_options={'api_endpoint': f'{region}-aiplatform.googleapis.com'}
+    )
+
+    endpoints = endpoint_client.list_endpoints(
+        request=aiplatform.gapic.ListEndpointsRequest(
+            parent=f'projects/{project_id}/locations/{region}',
+            filter=f'display_name="{endpoint_name}"',
+            page_size=1,
+            order_by='create_time desc',
+        )
+    )
+    found = next(iter(endpoints.endpoints), None)
 
-    if endpoints:
-        endpoint = endpoints[0]  # Use the first matching endpoint
+    if found:
+        endpoint = aiplatform.Endpoint(found.name)  # Use the newest match
         logger.info(f'Found existing endpoint: {endpoint.resource_name}')
     else:
         # If endpoint does not exist, create a new one
@@ -64,9 +85,9 @@ def deploy_model(
     # Deploy the model
     model.deploy(
         endpoint=endpoint,
-        machine_type='n1-standard-4',
-        min_replica_count=1,
-        max_replica_count=2,
+        machine_type=machine_type,
+        min_replica_count=min_replica_count,
+        max_replica_count=max_replica_count,
         enable_access_logging=True,
         disable_container_logging=False,
         deploy_request_timeout=600,
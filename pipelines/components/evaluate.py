@@ -1,19 +1,20 @@
-from kfp.dsl import component, Input, Artifact
+from kfp.dsl import component, Input, Output, Artifact, Metrics
 
+from components.images import component_image
 
-@component(
-    base_image='python:3.12',
+
+@component(**component_image(
+    'mh-evaluate',
     packages_to_install=[
-        'scikit-learn',
         'numpy',
         'xgboost',
-        'joblib'
     ],
-)
+))
 def evaluate_model(
     xtest_data: Input[Artifact],
     ytest_data: Input[Artifact],
     model: Input[Artifact],
+    metrics: Output[Metrics],
 ) -> bool:
     """
     Evaluate the model using historical data from the Feature Store.
@@ -22,37 +23,63 @@ def evaluate_model(
         xtest_data: Artifact of the test data
         ytest_data: Artifact of the test labels
         model: Artifact of the trained model
+        metrics: Output metrics artifact of the evaluation
 
     Returns:
         bool: True if the model evaluation is successful, False
     """
 
     import logging
-    import joblib
 
     import numpy as np
     import xgboost as xgb
-    from sklearn.metrics import log_loss
-    from sklearn.metrics import accuracy_score, precision_score
-    from sklearn.metrics import recall_score, f1_score
 
     logging.basicConfig(level=logging.INFO, force=True)
     logger = logging.getLogger(__name__)
 
     def evaluate_model(model_xgb, _x_test, y_test):
 
-        # Predict
-        y_pred_probs = model_xgb.predict(_x_test)
+        # Predict - straight on the float32 array, no DMatrix
+        y_pred_probs = model_xgb.inplace_predict(_x_test)
         y_pred = y_pred_probs.argmax(axis=1)
 
-        # Evaluate
-        final_log_loss = log_loss(y_test, y_pred_probs)
-
-        # Log model metrics
-        accuracy = accuracy_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred, average='weighted')
-        recall = recall_score(y_test, y_pred, average='weighted')
-        f1 = f1_score(y_test, y_pred, average='weighted')
+        n_classes = y_pred_probs.shape[1]
+
+        # Evaluate - log loss from the true class probabilities only,
+        # clipped like sklearn's log_loss
+        eps = np.finfo(y_pred_probs.dtype).eps
+        true_probs = np.take_along_axis(
+            y_pred_probs, y_test[:, None], axis=1)[:, 0]
+        final_log_loss = float(-np.log(np.clip(true_probs, eps, 1)).mean())
+
+        # Log model metrics - all derived from a single confusion matrix
+        # (rows: true class, columns: predicted class) instead of one label
+        # scan per sklearn metric
+        cm = np.bincount(
+            y_test * n_classes + y_pred, minlength=n_classes * n_classes
+        ).reshape(n_classes, n_classes)
+
+        tp = np.diag(cm).astype(np.float64)
+        support = cm.sum(axis=1)
+        predicted = cm.sum(axis=0)
+
+        # Classes never predicted (or absent) score 0, as in sklearn
+        class_precision = np.divide(
+            tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+        class_recall = np.divide(
+            tp, support, out=np.zeros_like(tp), where=support > 0)
+        pr_sum = class_precision + class_recall
+        class_f1 = np.divide(
+            2 * class_precision * class_recall, pr_sum,
+            out=np.zeros_like(tp), where=pr_sum > 0)
+
+        # Weighted averages - weighted by the true class support
+        weights = support / support.sum()
+
+        accuracy = float(tp.sum() / support.sum())
+        precision = float(class_precision @ weights)
+        recall = float(class_recall @ weights)
+        f1 = float(class_f1 @ weights)
 
         return final_log_loss, accuracy, precision, recall, f1
 
@@ -61,12 +88,16 @@ def evaluate_model(
     logger.info(f'Loading the model from {model.path}...')
 
     try:
-        # xgb_model = xgb.Booster()
-        # xgb_model.load_model(model.path)
-        xgb_model = joblib.load(model.path)
+        # The model is saved in XGBoost's native UBJSON format
+        xgb_model = xgb.Booster()
+        xgb_model.load_model(model.path)
 
-        xtest = xgb.DMatrix(xtest_data.path)
-        ytest = np.load(ytest_data.path)
+        # The test features are a float32 .npy array, memory-mapped too
+        xtest = np.load(xtest_data.path, mmap_mode='r')
+        # The labels are saved as int8 - memory-map them rather than
+        # reading a copy, the metric passes only touch them once
+        ytest = np.load(ytest_data.path, mmap_mode='r').astype(
+            np.int8, copy=False)
 
         # 2. Now we will evaluate the model
 
@@ -80,6 +111,14 @@ def evaluate_model(
         logger.info(f'Recall: {recall}')
         logger.info(f'F1: {f1}')
 
+        # Record the metrics on the run as well - the pipeline UI and
+        # Vertex AI Experiments read them from the artifact
+        metrics.log_metric('log_loss', final_log_loss)
+        metrics.log_metric('accuracy', accuracy)
+        metrics.log_metric('precision', precision)
+        metrics.log_metric('recall', recall)
+        metrics.log_metric('f1', f1)
+
     except Exception as e:
         logger.exception('Failed to evaluate the model.')
         raise e
@@ -0,0 +1,43 @@
+"""
+Base images for the pipeline components.
+
+Components with a prebuilt image (see docker/pipeline-components) run on it
+as is - their dependencies and kfp are baked into the image, so the step
+does not pip install anything at start up. Set COMPONENT_IMAGE_REPO to the
+Artifact Registry repository the images are pushed to when compiling the
+pipeline. Without it, components fall back to python:3.12 and install their
+packages when the step starts.
+"""
+
+import os
+
+# e.g. us-central1-docker.pkg.dev/<project>/mlops-repo
+COMPONENT_IMAGE_REPO = os.getenv('COMPONENT_IMAGE_REPO')
+# Tag of the prebuilt component images
+COMPONENT_IMAGE_TAG = 'py312'
+
+
+def component_image(name: str, packages_to_install: list) -> dict:
+    """
+    Return the image arguments for a component's @component decorator.
+
+    Args:
+        name (str): Name of the component's prebuilt image.
+        packages_to_install (list): Packages to install at start up when
+            no prebuilt image is available.
+
+    Returns:
+        dict: @component keyword arguments.
+    """
+    if COMPONENT_IMAGE_REPO:
+        return {
+            'base_image':
+                f'{COMPONENT_IMAGE_REPO}/{name}:{COMPONENT_IMAGE_TAG}',
+            # kfp is already installed in the image
+            'install_kfp_package': False,
+        }
+
+    return {
+        'base_image': 'python:3.12',
+        'packages_to_install': packages_to_install,
+    }
@@ -16,17 +16,18 @@ Output:
 
 from kfp.dsl import component, Output
 
+from components.images import component_image
 
-@component(
-    base_image='python:3.12',
+
+@component(**component_image(
+    'mh-preprocess',
     packages_to_install=[
         'pandas',
         'pyarrow',
         'google-cloud-storage',
         'google-cloud-bigquery',
-        'uuid7',
     ],
-)
+))
 def preprocess_data(
     bucket_name: str,
     project_id: str,
@@ -49,11 +50,18 @@ def preprocess_data(
         - bool: True if the data is successfully preprocessed, False otherwise
     """
 
+    import os
+    import time
     import logging
-    from uuid_extensions import uuid7
+    import resource
 
+    import numpy as np
     import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import google.auth
     from google.cloud import storage, bigquery
+    from google.cloud.storage import transfer_manager
 
     logging.basicConfig(level=logging.INFO, force=True)
     logger = logging.getLogger(__name__)
@@ -75,22 +83,23 @@ def preprocess_data(
     #    Helper methods
     # ####################################
 
-    def get_latest_file(bucket_name, prefix=None):
+    def get_latest_file(client, bucket_name, prefix=None):
         '''Fetches the latest file from a GCS bucket.'''
 
         logger.info(f'Fetching the latest file from the GCS bucket..')
 
-        client = storage.Client()
         bucket = client.bucket(bucket_name)
-        blobs = list(bucket.list_blobs(prefix=prefix))
-
-        # Sort by last modified time
-        blobs.sort(key=lambda x: x.updated, reverse=True)
-
-        if not blobs:
+        # Only the metadata needed below is listed, and the newest object
+        # is picked while paging instead of sorting the listing
+        blobs = bucket.list_blobs(
+            prefix=prefix,
+            fields='items(name,updated,size,generation,crc32c),nextPageToken')
+        latest_blob = max(blobs, key=lambda x: x.updated, default=None)
+
+        if latest_blob is None:
             logger.error('No files found in GCS bucket.')
-
-        latest_blob = blobs[0]  # Get the latest file
+            raise FileNotFoundError(
+                f'No files found in gs://{bucket_name}/{prefix or ""}')
 
         logger.info(f'Latest file: {latest_blob.name}')
 
@@ -99,19 +108,56 @@ def preprocess_data(
         logger.info(f'Downloading the latest file to /tmp...')
 
         local_path = f'/tmp/{latest_blob.name.split('/')[-1]}'
-        latest_blob.download_to_filename(local_path)
+        # Download in 32 MiB byte ranges over parallel connections - a
+        # single stream is capped well below the VM's network bandwidth.
+        # The listed size and generation pin the slices to one object
+        # version, and the listed CRC32C is what the reassembled file is
+        # verified against - with all three, no reload is needed.
+        transfer_manager.download_chunks_concurrently(
+            latest_blob,
+            local_path,
+            chunk_size=32 * 1024 * 1024,
+            max_workers=8,
+            worker_type=transfer_manager.THREAD,
+        )
 
         logger.info(f'File downloaded to {local_path}')
 
         return local_path
         # Load and preprocess data
 
+    def uuid7_strings(n):
+        '''Generates n UUIDv7 strings at once (RFC 9562).
+
+        All ids share the current Unix time in milliseconds, the remaining
+        bits are random. Built with array operations into an Arrow string
+        array instead of one Python uuid object and str per row.
+        '''
+
+        ids = np.frombuffer(os.urandom(16 * n), dtype=np.uint8)
+        ids = ids.reshape(n, 16).copy()
+
+        # 48-bit big-endian timestamp, then the version and variant bits
+        unix_ms = time.time_ns() // 1_000_000
+        ids[:, :6] = np.frombuffer(unix_ms.to_bytes(6, 'big'), dtype=np.uint8)
+        ids[:, 6] = 0x70 | (ids[:, 6] & 0x0F)
+        ids[:, 8] = 0x80 | (ids[:, 8] & 0x3F)
+
+        # Hex digits laid out in the 8-4-4-4-12 form
+        digits = np.frombuffer(ids.tobytes().hex().encode(), dtype=np.uint8)
+        text = np.full((n, 36), ord('-'), dtype=np.uint8)
+        text[:, np.r_[0:8, 9:13, 14:18, 19:23, 24:36]] = digits.reshape(n, 32)
+
+        return pa.array(text.view('S36').ravel()).cast(pa.string())
+
     # ####################################
     #    Main logic
     # ####################################
 
     try:
-        # Initialize BigQuery client
+        # Resolve the default credentials once - both clients share them,
+        # so the credential discovery and token fetch are not repeated
+        credentials, _ = google.auth.default()
 
         logger.info(f'Fetching the latest file from the GCS bucket {
                     bucket_name}...')
@@ -120,37 +166,67 @@ def preprocess_data(
 
         # Fetch the latest file from the GCS bucket
         latest_file = get_latest_file(
+            client=storage.Client(project=project_id, credentials=credentials),
             bucket_name=parent, prefix=data_file_subdir)
 
         logger.info(f'Loading the file into a pandas DataFrame...')
 
-        # Load the file into a pandas DataFrame
-        df = pd.read_csv(latest_file, index_col=0)
-        # Get all included columns. See: FEATURE_NAMES
-        df = df[FEATURE_NAMES]
-        # Convert all data columns to int
-        df = df.astype('int64')
+        # Load the file into a pandas DataFrame - parsed by Arrow's
+        # multi-threaded CSV reader, which converts only the included
+        # columns (See: FEATURE_NAMES), so the full-width frame is never
+        # held in memory.
+        # The codes are parsed as float64, so the codes written as floats
+        # ('1.0', e.g. by a pandas to_csv after a float stage) load as well
+        # as integer literals.
+        # The survey codes go up to 999 (e.g. ALCDAY4, EXEROFT1), so int16
+        # holds every column - the same dtype the predictor serves with.
+        # The safe cast rejects fractional and out-of-range values (unlike
+        # a pandas cast, which truncates or wraps them).
+        table = pa_csv.read_csv(
+            latest_file,
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=FEATURE_NAMES,
+                column_types={col: pa.float64() for col in FEATURE_NAMES},
+            ),
+        )
+        table = table.cast(
+            pa.schema([(col, pa.int16()) for col in table.column_names]),
+            safe=True)
+        # Get the columns converted to lowercase, removing the prefix '_'
+        # in any column name - renamed on the Arrow table (no data copy)
+        # before the DataFrame and its column Index are built
+        table = table.rename_columns(
+            [col.lower().lstrip('_') for col in FEATURE_NAMES])
+        df = table.to_pandas()
+        del table
         # Add a 'entity_id':id, 'feature_time':ts columns
         #  (Vertex-ai feature store requirement),
-        df['id'] = [str(uuid7()) for _ in range(len(df))]
+        df['id'] = pd.arrays.ArrowStringArray(uuid7_strings(len(df)))
         df['ts'] = pd.Timestamp.utcnow().strftime('%Y-%m-%d %H:%M:%S')
 
-        # Get the columns from the DataFrame converted to lowercase,
-        # removing the prefix '_' in any column name
-        df.columns = [col.lower().lstrip('_') for col in df.columns]
-
         # Ingest the data into the featurestore
 
         logger.info('Initializing biqquery client...')
 
         full_table_id = f'{project_id}.{featurestore_id}.{entity_type_id}'
 
+        # Explicit schema, as defined for the table in terraform - the frame
+        # is uploaded as Parquet and BigQuery skips the schema inference
+        schema = [
+            bigquery.SchemaField(
+                col, 'STRING' if col in ('id', 'ts') else 'INT64',
+                mode='REQUIRED')
+            for col in df.columns
+        ]
+
         job_config = bigquery.LoadJobConfig(
             write_disposition=bigquery.WriteDisposition.WRITE_APPEND,  # Append to existing table
-            autodetect=True,  # Auto-detect schema
+            source_format=bigquery.SourceFormat.PARQUET,
+            schema=schema,
         )
 
-        client = bigquery.Client(project=project_id, location=region)
+        client = bigquery.Client(
+            project=project_id, location=region, credentials=credentials)
 
         logger.info(f'Ingesting {df.shape[0]} rows into {entity_type_id}...')
 
@@ -162,6 +238,11 @@ def preprocess_data(
 
         logger.info(f'Ingested {job.output_rows} rows into {entity_type_id}.')
 
+        # Peak RSS of the component (ru_maxrss is in KiB on Linux) - the
+        # frame is the only full copy of the data, this makes growth visible
+        peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        logger.info(f'Peak memory: {peak_mib:.0f} MiB')
+
     except Exception as e:
         logger.error(f'Error in preprocessing data: {str(e)}')
         raise e
@@ -9,11 +9,13 @@ where the component runs.
 
 from kfp.dsl import component, Input, Output, Artifact
 
+from components.images import component_image
 
-@component(
-    base_image='python:3.12',
+
+@component(**component_image(
+    'mh-register',
     packages_to_install=['google-cloud-aiplatform'],
-)
+))
 def register_model(
     project_id: str,
     region: str,
@@ -51,7 +53,7 @@ def register_model(
     # Define the destination path in GCS
     bucket_name = 'mlops-gcs-bucket'
     model_dst_path = 'models/xgb-model'
-    model_dst_filename = 'model.joblib'
+    model_dst_filename = 'model.ubj'
 
     # Define the source path of the model artifact
     model_src_path = model_artifact.path
@@ -67,13 +69,36 @@ def register_model(
     # Get the GCS bucket
     bucket = client.bucket(bucket_name)
 
-    logger.info(f'Uploading model from model artifact {model_src_path}...')
-
-    # Upload the model directory to GCS
-    blob = bucket.blob(gcs_model_path)
-    blob.upload_from_filename(model_src_path)
+    logger.info(f'Copying model from model artifact {model_src_path}...')
+
+    # The artifact already lives in the pipeline root bucket - copy it
+    # server-side rather than streaming it through the component
+    # (read from the GCS FUSE mount, then uploaded again)
+    src_blob = storage.Blob.from_string(model_artifact.uri, client=client)
+    src_blob.reload()
+
+    # Skip the copy if the registered file already has the same content
+    # (a retrain that produced an identical model) - compared by the hashes
+    # GCS keeps for both objects, so nothing is downloaded or hashed here.
+    # Composite objects have no MD5, CRC32C is compared for them instead.
+    def same_content(src, dst):
+        if dst is None:
+            return False
+        for attr in ('md5_hash', 'crc32c'):
+            src_hash = getattr(src, attr)
+            if src_hash is not None and getattr(dst, attr) is not None:
+                return src_hash == getattr(dst, attr)
+        return False
+
+    dst_blob = bucket.get_blob(gcs_model_path)
+    if same_content(src_blob, dst_blob):
+        logger.info(
+            f'Model artifact unchanged in GCS: {model_artifact_uri}, '
+            'skipping the copy.')
+    else:
+        src_blob.bucket.copy_blob(src_blob, bucket, gcs_model_path)
+        logger.info(f'Uploaded model artifact to GCS: {model_artifact_uri}.')
 
-    logger.info(f'Uploaded model artifact to GCS: {model_artifact_uri}.')
     logger.info(f'Registering model with display name: {display_name}...')
 
     # Initialize Vertex AI client to register the model
@@ -1,8 +1,10 @@
 from kfp.dsl import component, Output, Artifact
 
+from components.images import component_image
 
-@component(
-    base_image='python:3.12',
+
+@component(**component_image(
+    'mh-train',
     packages_to_install=[
         'scikit-learn',
         'xgboost',
@@ -12,9 +14,9 @@ from kfp.dsl import component, Output, Artifact
         'google-cloud-bigquery-storage',
         'google-cloud-bigquery',
         'db-dtypes',
-        'joblib'
+        'psutil'
     ],
-)
+))
 def train_model(
     project_id: str,
     region: str,
@@ -51,24 +53,29 @@ def train_model(
     evaluated using the test set.
     """
 
+    import gc
     import os
+    import json
     import logging
-    import joblib
+    import importlib
 
     import numpy as np
     import pandas as pd
+    import psutil
 
-    import xgboost as xgb
-    from sklearn.model_selection import train_test_split
-    from bayes_opt import BayesianOptimization
-    from sklearn.metrics import log_loss
-    from sklearn.utils.class_weight import compute_class_weight
+    from concurrent.futures import ThreadPoolExecutor
 
     from google.cloud import bigquery
 
     logging.basicConfig(level=logging.INFO, force=True)
     logger = logging.getLogger(__name__)
 
+    # XGBoost threads per training - physical cores, as hyperthreads
+    # compete for the same caches while building the histograms. A single
+    # training stops scaling at about 8 threads (OpenMP sync overhead).
+    CPU_CORES = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    MAX_NTHREAD = 8
+
     TARGET = 'ment14d'
     FEATURE_IDS = [
         'poorhlth', 'physhlth', 'genhlth', 'diffwalk', 'diffalon',
@@ -107,15 +114,17 @@ def train_model(
 
         def __init__(self, df):
             """
-            Initialize the dataset and define the dataset characteristics
+            Initialize the dataset and define the dataset characteristics.
+            The composite features are added to df in place - the caller
+            hands the frame over.
 
             Task:
             - Load and prepare the dataset
             - Define the dataset characteristics
             """
 
-            # 1. Make a copy of the dataset
-            self._df = df.copy()
+            # 1. Take the dataset over (no defensive copy of the frame)
+            self._df = df
 
             # Integrate composite features
             self._integrate_composite_features()
@@ -150,79 +159,132 @@ def train_model(
             return self._df
 
         def _integrate_composite_features(self):
-            # Create a new copy of the cleaned dataset
-            mental_health_features = ['emtsuprt', 'addepev3', 'poorhlth']
+            # Computed on the NumPy columns - each (BigQuery Int64) column
+            # is converted once, without intermediate Series
+            def column(name):
+                return self._df[name].to_numpy(np.int64)
+
             # Using Nonlinear interaction
-            self._df['Physical_Mental_Interaction'] = self._df['genhlth'].astype(
-                int) * self._df['physhlth']
+            self._df['Physical_Mental_Interaction'] = (
+                column('genhlth') * column('physhlth'))
             # Income and Education Interaction
-            self._df['Income_Education_Interaction'] = self._df['income3'].astype(
-                int) * self._df['educa'].astype(int)
-            # Mental Health
-            self._df['Mental_Health_Composite'] = self._df[
-                mental_health_features
-            ].mean(axis=1)
+            self._df['Income_Education_Interaction'] = (
+                column('income3') * column('educa'))
+            # Mental Health - mean of emtsuprt, addepev3 and poorhlth
+            self._df['Mental_Health_Composite'] = (
+                column('emtsuprt') + column('addepev3') + column('poorhlth')
+            ) / 3
+
+    def training_device():
+        '''Returns 'cuda' if XGBoost can train on a GPU here, else 'cpu'.
+
+        XGBoost falls back to the CPU with a warning when no GPU is
+        visible - the device a probe training ended up on tells which.
+        Builds without CUDA, or a GPU that fails to initialize, raise
+        instead - the training then runs on the CPU too.
+        '''
+
+        try:
+            probe = xgb.DMatrix(np.zeros((2, 1)), label=np.zeros(2))
+            booster = xgb.train(
+                {'device': 'cuda', 'tree_method': 'hist'}, probe,
+                num_boost_round=1)
+        except xgb.core.XGBoostError as e:
+            logger.warning(f'GPU training unavailable, using the CPU: {e}')
+            return 'cpu'
+
+        config = json.loads(booster.save_config())
+
+        return config['learner']['generic_param']['device'].split(':')[0]
+
+    # _MENT14D labels:
+    #   (0 Days: 1, 1-13 Days: 2, 14+ Days: 3, Unsure: 9)
+    # _MENT14D_ to xgboost label lookup table, indexed by the label.
+    # Unknown labels map to -1.
+    _target_label_lut = np.full(10, -1, dtype=np.int8)
+    _target_label_lut[[1, 2, 3, 9]] = [0, 1, 2, 3]
 
     def target_label_mapping(y=None):
         ''' Convert target dataset labels to xgboost which starts from 0 '''
-        # _MENT14D labels:
-        #   (0 Days: 1, 1-13 Days: 2, 14+ Days: 3, Unsure: 9)
-        # _MENT14D_ to xgboost label mapping
-        label_mapping = {1: 0, 2: 1, 3: 2, 9: 3}
-        # Convert to xgboost labels
-        return np.vectorize(label_mapping.get)(y)
-
-    def train_model(
-        X_train, _y_train, x_val, _y_val, x_test, _y_test
-    ) -> tuple[xgb.Booster, xgb.DMatrix]:
+        y = np.asarray(y, dtype=np.intp)
+
+        if y.size and (y.min() < 0 or y.max() >= len(_target_label_lut)):
+            raise ValueError(f'Unknown {TARGET} labels in the dataset.')
+
+        # Convert to xgboost labels - a single vectorized gather
+        labels = _target_label_lut[y]
+
+        if (labels < 0).any():
+            raise ValueError(f'Unknown {TARGET} labels in the dataset.')
+
+        return labels
+
+    def train_model(X_train, _y_train, x_val, _y_val) -> 'xgb.Booster':
         """
         Train model given a dataset: Run hyperparameter tuning and
             train the model using evaluation data.
         Returns the best hyperparameters and class weights for the model.
 
         Returns:
-            tuple: best hyperparameters, class weights
+            xgb.Booster: the trained model
         """
 
         # Compute class weights for balancing the skewness of the target classes(4).
 
+        classes = np.unique(_y_train)
         class_weights = compute_class_weight(
             'balanced',
-            classes=np.unique(_y_train),
+            classes=classes,
             y=_y_train
         )
-        class_weights_dict = dict(enumerate(class_weights))
-        sample_weight = np.array([class_weights_dict[class_label]
-                                  for class_label in _y_train])
+        # Per-row weights with a single gather - searchsorted maps each
+        # label to its index in classes, even if a class is absent
+        sample_weight = class_weights[np.searchsorted(classes, _y_train)]
+
+        # Build the training and validation matrices once - shared by
+        # every tuning training and the final training. The validation
+        # matrix reuses the training quantile cuts (ref) instead of
+        # sketching its own.
+        _x_train = xgb.QuantileDMatrix(
+            X_train,
+            label=_y_train,
+            feature_names=feature_names,
+            feature_types=feature_types,
+            enable_categorical=True,
+            weight=sample_weight
+        )
+
+        _x_val = xgb.QuantileDMatrix(
+            x_val,
+            label=_y_val,
+            feature_names=feature_names,
+            feature_types=feature_types,
+            enable_categorical=True,
+            ref=_x_train
+        )
 
         # Hyper parameter tuning - use validation data
         h_params = _hyper_parameter_tuning(
-            X_train,
-            _y_train,
-            x_val,
-            _y_val,
-            sample_weight
+            _x_train,
+            _x_val,
+            _y_val
         )
 
         if h_params is None:
             logger.error('Hyperparameter tuning failed.')
             return None
 
-        xgb_model, _x_test = _create_and_train_model(
-            X_train,
-            _y_train,
-            x_test,
-            _y_test,
-            h_params,
-            sample_weight
+        xgb_model = _create_and_train_model(
+            _x_train,
+            h_params
         )
 
         if xgb_model is None:
             return None
 
-        return xgb_model, _x_test
+        return xgb_model
 
-    def _hyper_parameter_tuning(X_train, y_train, x_test, y_test, sample_weight) -> dict:
+    def _hyper_parameter_tuning(_x_train, _x_test, y_test) -> dict:
         """
         This function tunes the hyperparameters for the model using
         the training and validation data.
@@ -234,29 +296,45 @@ def train_model(
         lowest log-loss is selected as the best model.
 
         Args:
-        X_train: (array) training set features
-        y_train: (array) training set target
-        x_test: (array) validation set features
+        _x_train: (QuantileDMatrix) weighted training set
+        _x_test: (QuantileDMatrix) validation set
         y_test: (array) validation set target
-        sample_weight: (array) class weights
 
         Returns:
         dict: best hyperparameters
         """
 
-        # Create the tuning model using DMatrix for XGBoost
-        _x_train = xgb.DMatrix(
-            X_train,
-            label=y_train,
-            enable_categorical=True,
-            weight=sample_weight
-        )
-
-        _x_test = xgb.DMatrix(
-            x_test,
-            label=y_test,
-            enable_categorical=True
-        )
+        # On the CPU, trainings run concurrently in threads - xgb.train
+        # releases the GIL and every thread shares the same DMatrix (nothing
+        # is pickled). The cores are split between the concurrent trainings.
+        # On the GPU, one training already occupies the device - candidates
+        # are suggested and trained one at a time.
+        n_jobs = 1 if device == 'cuda' else min(4, CPU_CORES)
+        nthread = min(MAX_NTHREAD, max(1, CPU_CORES // n_jobs))
+
+        # Validation log-loss per round of every training that ran to its
+        # end. A training is pruned once its log-loss is worse than their
+        # median at the same round (median pruning), so dominated candidates
+        # stop well before early stopping would catch them.
+        finished_curves = []
+
+        class MedianPruning(xgb.callback.TrainingCallback):
+            def __init__(self, warmup_rounds=20, min_curves=5):
+                super().__init__()
+                self.warmup_rounds = warmup_rounds
+                self.min_curves = min_curves
+                self.pruned = False
+
+            def after_iteration(self, model, epoch, evals_log):
+                if epoch < self.warmup_rounds:
+                    return False
+                past = [c[epoch] for c in finished_curves if len(c) > epoch]
+                if len(past) < self.min_curves:
+                    return False
+                loss = evals_log['eval']['mlogloss'][-1]
+                self.pruned = loss > np.median(past)
+                # Returning True stops the training
+                return self.pruned
 
         # Define Bayesian optimization callback function
         # and train at each iteration
@@ -266,6 +344,10 @@ def train_model(
                 'eval_metric': 'mlogloss',
                 'objective': 'multi:softprob',
                 'num_class': 4,
+                'tree_method': 'hist',
+                'max_cat_to_onehot': 4,
+                'device': device,
+                'nthread': nthread,
                 'max_depth': int(max_depth),
                 'learning_rate': learning_rate,
                 'subsample': subsample,
@@ -275,19 +357,30 @@ def train_model(
                 'reg_lambda': reg_lambda
             }
 
-            # Train model with current hyperparameters
+            # Train model with current hyperparameters. Stop once the
+            # validation log-loss has not improved for 20 rounds, so poor
+            # candidates do not train to num_boost_round.
+            pruning = MedianPruning()
+            evals_result = {}
             model = xgb.train(
                 params,
                 _x_train,
                 num_boost_round=int(num_boost_round),
-                # evals=[(_x_test, 'eval')],
+                evals=[(_x_test, 'eval')],
+                early_stopping_rounds=20,
+                callbacks=[pruning],
+                evals_result=evals_result,
                 verbose_eval=False
             )
+            # Pruned curves are truncated, keep them out of the median
+            if not pruning.pruned:
+                finished_curves.append(evals_result['eval']['mlogloss'])
 
-            # Predict probabilities
-            y_pred_probs = model.predict(_x_test)
-            # Compute log-loss
-            return -log_loss(y_test, y_pred_probs)
+            # Predict probabilities - with the trees up to the best round
+            y_pred_probs = model.predict(
+                _x_test, iteration_range=(0, model.best_iteration + 1))
+            # Compute log-loss, with the number of rounds it was reached at
+            return -log_loss(y_test, y_pred_probs), model.best_iteration + 1
 
         # Bounds for hyperparameters
         # TODO - configurable hyperparameters
@@ -303,21 +396,46 @@ def train_model(
             'reg_lambda': [1, 5],
         }
 
-        # Bayesian optimization
+        # Bayesian optimization, suggesting n_jobs points at a time.
+        # The constant liar registers placeholder targets for the pending
+        # points, so a batch does not suggest the same point n_jobs times.
         optimizer = BayesianOptimization(
-            f=xgb_eval,
+            f=None,
             pbounds=param_bounds,
+            acquisition_function=acquisition.ConstantLiar(
+                acquisition.UpperConfidenceBound()),
             verbose=False
         )
-        # Run the optimization tasks then extract optimized results
-        optimizer.maximize(init_points=5, n_iter=25)
+
+        # 5 random initial points (suggested while no point is registered),
+        # then 25 guided iterations - in batches of up to n_jobs points
+        init_points, n_iter = 5, 25
+        batch_sizes = [init_points] + [
+            min(n_jobs, n_iter - i) for i in range(0, n_iter, n_jobs)
+        ]
+
+        # Run the optimization tasks then extract optimized results.
+        # Keep the early-stopped number of rounds of the best candidate.
+        best_target, best_rounds = None, None
+
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            for batch_size in batch_sizes:
+                candidates = [optimizer.suggest() for _ in range(batch_size)]
+                results = pool.map(lambda p: xgb_eval(**p), candidates)
+
+                for params, (target, rounds) in zip(candidates, results):
+                    optimizer.register(params=params, target=target)
+
+                    if best_target is None or target > best_target:
+                        best_target, best_rounds = target, rounds
 
         # Tuning is done, get the best parameters
 
         best_params = optimizer.max['params']
         best_params['max_depth'] = int(best_params['max_depth'])
-        best_params['num_boost_round'] = int(
-            best_params['num_boost_round'])
+        # The final model trains as many rounds as the best candidate
+        # did before early stopping - not the suggested upper bound
+        best_params['num_boost_round'] = best_rounds
         best_params['learning_rate'] = float(best_params['learning_rate'])
         best_params['subsample'] = float(best_params['subsample'])
         best_params['colsample_bytree'] = float(
@@ -328,8 +446,7 @@ def train_model(
 
         return best_params
 
-    def _create_and_train_model(
-            X_train, y_train, x_test, y_test, h_params, sample_weight):
+    def _create_and_train_model(_x_train, h_params):
         """
         This function trains the xgboost model using the optimized
         hyperparameters. The model is a classifier with categorical and
@@ -342,12 +459,8 @@ def train_model(
         loss and optimize recall for the minority classes.
 
         Args:
-        X_train: (array) training set features
-        y_train: (array) training set target
-        x_test: (array) test set features
-        y_test: (array) test set target
+        _x_train: (QuantileDMatrix) weighted training set
         h_params: (dict) hyperparameters
-        sample_weight: (array) class weights
 
         Returns:
         object: trained model
@@ -358,6 +471,10 @@ def train_model(
             'eval_metric': 'mlogloss',
             'objective': 'multi:softprob',
             'num_class': 4,
+            'tree_method': 'hist',
+            'max_cat_to_onehot': 4,
+            'device': device,
+            'nthread': min(MAX_NTHREAD, CPU_CORES),
             'max_depth': h_params['max_depth'],
             'learning_rate': h_params['learning_rate'],
             'subsample': h_params['subsample'],
@@ -368,29 +485,14 @@ def train_model(
         }
         num_boost_round = h_params['num_boost_round']
 
-        # Create the tuning model using DMatrix for XGBoost
-        _x_train = xgb.DMatrix(
-            X_train,
-            label=y_train,
-            enable_categorical=True,
-            weight=sample_weight
-        )
-
-        _x_test = xgb.DMatrix(
-            x_test,
-            label=y_test,
-            enable_categorical=True,
-        )
-
         # Train model
         model_xgb = xgb.train(
             params,
             _x_train,
-            # evals=[(_x_test, 'eval')],
             num_boost_round=int(num_boost_round),
         )
 
-        return model_xgb, _x_test
+        return model_xgb
 
     # ####################################
     #    Main logic
@@ -403,16 +505,42 @@ def train_model(
 
         client = bigquery.Client(project=project_id, location=region)
 
+        # TODO: Temporary - reduce the dataset size for testing
+        # Rows are sampled in BigQuery (each kept with probability 4%), so
+        # only the sample is transferred instead of the whole table
         query = f'''
             SELECT {','.join(str(feat) for feat in FEATURE_IDS)}
             FROM `{project_id}.{featurestore_id}.{entity_type_id}`
+            WHERE RAND() < 0.04
         '''
 
         logger.info('Reading records from the Feature Store...')
 
-        # TODO: Temporary - reduce the dataset size for testing
-        tmp_training_df = client.query(query).to_dataframe()
-        df = tmp_training_df.sample(frac=0.04)
+        # Read the result as Arrow over the BigQuery Storage API, then hand
+        # the columns to pandas one block per column, freeing each Arrow
+        # buffer as it is converted - the result is never held twice
+        # XGBoost, scikit-learn and bayes_opt load their native libraries
+        # on import (about a second) - they are imported in a thread while
+        # the query runs, and bound below once the rows are read
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            preload = pool.map(importlib.import_module, [
+                'xgboost', 'sklearn.model_selection', 'sklearn.metrics',
+                'sklearn.utils.class_weight', 'bayes_opt',
+            ])
+
+            result = client.query(query).to_arrow(
+                create_bqstorage_client=True)
+            df = result.to_pandas(split_blocks=True, self_destruct=True)
+            del result
+
+            # Re-raises an import error
+            list(preload)
+
+        import xgboost as xgb
+        from sklearn.model_selection import train_test_split
+        from bayes_opt import BayesianOptimization, acquisition
+        from sklearn.metrics import log_loss
+        from sklearn.utils.class_weight import compute_class_weight
 
         # 1a. Incorporate composite features
 
@@ -427,64 +555,116 @@ def train_model(
         logger.info('Preparing the datasets for training...')
 
         target = TARGET
-        X, y = training_df.drop(columns=[target]), training_df[target]
-
-        # 3. Split into train (60%), eval(20%), and test(20%) sets
+        feature_names = [col for col in training_df.columns if col != target]
+        # The survey codes are split on natively as categories (partitions
+        # of the codes, one-hot for up to 4 of them) instead of as ordered
+        # values. The types are stored in the model, so serving predicts
+        # on the same plain float32 rows.
+        categorical = set(mh.categorical_features)
+        feature_types = [
+            'c' if col in categorical else 'q' for col in feature_names
+        ]
+
+        # One C-contiguous float32 array - XGBoost reads the matrices row
+        # by row, and the frame's column blocks (int64/float64) would be
+        # converted again for every DMatrix. The values are small ints
+        # (and the composite mean), exact or as served in float32.
+        # Filled column by column from the frame, so neither a copy of the
+        # frame without the target nor a column-major array is built.
+        X = np.empty((len(training_df), len(feature_names)), dtype=np.float32)
+        for i, col in enumerate(feature_names):
+            X[:, i] = training_df[col].to_numpy()
+        y = training_df[target].to_numpy(dtype=np.int64)
+
+        # 3. Split into train (60%), eval(20%), and test(20%) sets.
+        # The row indices are split, so each set is gathered from X once
+        # (no intermediate copy of the 40% eval/test rows)
+
+        # A seeded shuffle keeps the split reproducible. A plain permutation
+        # keeps every class near its share unless one is rare (under 1% of
+        # the rows) - only then is the split stratified
+        seed = 42
+        _, class_counts = np.unique(y, return_counts=True)
+
+        if class_counts.min() < 0.01 * len(y):
+            train_idx, temp_idx = train_test_split(
+                np.arange(len(y)),
+                stratify=y,
+                test_size=0.4,
+                random_state=seed
+            )
 
-        X_train, x_temp, y_train, y_temp = train_test_split(
-            X,
-            y,
-            stratify=y,
-            test_size=0.4
-        )
+            val_idx, test_idx = train_test_split(
+                temp_idx,
+                stratify=y[temp_idx],
+                test_size=0.5,
+                random_state=seed
+            )
+        else:
+            idx = np.random.default_rng(seed=seed).permutation(len(y))
+            n_train, n_val = int(len(y) * 0.6), int(len(y) * 0.2)
+            train_idx, val_idx, test_idx = np.split(
+                idx, [n_train, n_train + n_val])
 
-        x_val, x_test, y_val, y_test = train_test_split(
-            x_temp,
-            y_temp,
-            stratify=y_temp,
-            test_size=0.5
-        )
+        X_train, x_val, x_test = X[train_idx], X[val_idx], X[test_idx]
+        y_train, y_val, y_test = y[train_idx], y[val_idx], y[test_idx]
 
         _y_train = target_label_mapping(y=y_train)
         _y_val = target_label_mapping(y=y_val)
         _y_test = target_label_mapping(y=y_test)
 
+        # The sets are gathered - drop the frame and the full matrix before
+        # training, so they do not stay resident next to the DMatrices.
+        # Collected explicitly, as pandas frames can sit in reference cycles
+        del df, training_df, mh, X, y
+        gc.collect()
+
         # 4. Now we will train the model
 
-        logger.info('Training the model...')
+        # Histogram building and split finding run on the GPU when the
+        # task has one attached, the CPU otherwise
+        device = training_device()
+
+        logger.info(f'Training the model on {device}...')
 
         # Train the model
-        xgb_model, _x_test = train_model(
+        xgb_model = train_model(
             X_train,
             _y_train,
             x_val,
-            _y_val,
-            x_test,
-            _y_test
+            _y_val
         )
 
-        if xgb_model is None or _x_test is None:
-            logger.error('Model training failed.')
-            return False
+        if xgb_model is None:
+            # Fail the step - the pipeline does not run the steps after it
+            raise RuntimeError('Model training failed.')
 
         # 4. Save the model and test sets for the evaluation component
 
         logger.info('Saving the model and test sets...')
 
-        joblib.dump(xgb_model, model_output.path)
+        # Serving runs on CPU - do not carry the training device over
+        xgb_model.set_param({'device': 'cpu'})
+
+        # Save in XGBoost's native UBJSON format - loads without pickle
+        # and much faster than a joblib dump
+        with open(model_output.path, 'wb') as f:
+            f.write(xgb_model.save_raw(raw_format='ubj'))
 
         logger.info(f'Model saved to {model_output.path}')
 
-        _x_test.save_binary(xtest_output.path)
+        # The test features as a plain float32 .npy array - the evaluation
+        # memory-maps it and predicts on it directly (no DMatrix to parse)
+        with open(xtest_output.path, 'wb') as f:
+            np.save(f, x_test, allow_pickle=False)
 
         logger.info(f'Test features saved to {xtest_output.path}')
 
-        np.save(ytest_output.path, _y_test)
-        # np.save appends `.npy` to the file name which is not conformant
-        # with the output.path file naming format - Rename the file to
-        # remove the .npy extension
-        if os.path.exists(ytest_output.path + ".npy") and not os.path.exists(ytest_output.path):
-            os.rename(ytest_output.path + ".npy", ytest_output.path)
+        # Labels are 0-3 - int8 keeps the artifact 8x smaller than int64.
+        # Written through the open file, so np.save does not append `.npy`
+        # to the output.path file name
+        with open(ytest_output.path, 'wb') as f:
+            np.save(f, _y_test.astype(np.int8, copy=False), allow_pickle=False)
 
         logger.info(f'Test target saved to {ytest_output.path}')
         logger.info('Model training completed successfully.')
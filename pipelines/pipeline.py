@@ -37,7 +37,7 @@ Pipeline Steps:
     - Deploy the trained model to a Vertex AI endpoint for serving predictions.
 """
 
-import logging
+import os
 
 import kfp.dsl as dsl
 from kfp.dsl import pipeline, component
@@ -49,6 +49,11 @@ from components.evaluate import evaluate_model
 from components.register import register_model
 from components.deploy_cloudrun import deploy_model
 
+# GPU type to train on, e.g. NVIDIA_TESLA_T4 - set when compiling the
+# pipeline, for a region and project with quota for it. Unset, the train
+# step runs on a CPU node.
+TRAIN_ACCELERATOR_TYPE = os.getenv('TRAIN_ACCELERATOR_TYPE')
+
 
 def run_mental_health_pipeline(
     project_id: str,
@@ -67,6 +72,7 @@ def run_mental_health_pipeline(
         1. Preprocess Data: Get the latest dataset from a GCS bucket.
         2. Train Model: Train the XGBoost model using the training dataset.
         3. Evaluate Model: Evaluate model performance on the test dataset.
+            Runs alongside steps 4-6, which only need the trained model.
         4. Register Model: Register the trained model in the Vertex AI Model
             Registry.
         5. Build Middleware Container: Build a container image for the model
@@ -83,15 +89,10 @@ def run_mental_health_pipeline(
         container_image (str): The container image name.
     """
 
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-
-    # We want to cache the results of each step in the pipeline for subsequent
-    # runs and reuse the component the same image, but exceptions can
-    # invalidate the cache. Handle exceptions and set run_success to False
-    # if an error occurs. This will prevent the pipeline from running the
-    # next steps, and will not invalidate the cache.
-    run_success = True
+    # Each step only runs once the steps it depends on (through their
+    # artifacts or .after) succeeded - a failing component raises, and
+    # Vertex AI does not start its downstream steps. The components' bool
+    # outputs are not used as guards: they are only known at run time.
 
     # -------------------------------------
     # Step 1: Preprocess data
@@ -104,80 +105,74 @@ def run_mental_health_pipeline(
         featurestore_id=featurestore_id,
         entity_type_id=entity_type_id
     )
-
-    run_success = preprocess_task.output
+    # Never cached - it ingests whatever file is newest in the bucket,
+    # which its (unchanged) parameters do not reflect
+    preprocess_task.set_caching_options(enable_caching=False)
 
     # -------------------------------------
     # Step 2: Train model
     # -------------------------------------
 
-    if run_success:
-        train_task = train_model(
-            project_id=project_id,
-            region=region,
-            featurestore_id=featurestore_id,
-            entity_type_id=entity_type_id
-        ).after(preprocess_task)  # Make sure to run after preprocessing
+    train_task = train_model(
+        project_id=project_id,
+        region=region,
+        featurestore_id=featurestore_id,
+        entity_type_id=entity_type_id
+    ).after(preprocess_task)  # Make sure to run after preprocessing
 
-    run_success = train_task.outputs['Output']
+    # Never cached - it reads the feature table the preprocessing
+    # just appended to. The steps after it consume its new artifacts,
+    # so they stay cacheable and rerun only on a new model.
+    train_task.set_caching_options(enable_caching=False)
+
+    # Train on a GPU node when one is configured - the component detects
+    # the GPU and trains on the CPU without one
+    if TRAIN_ACCELERATOR_TYPE:
+        train_task.set_accelerator_type(
+            TRAIN_ACCELERATOR_TYPE).set_accelerator_limit(1)
 
     # -------------------------------------
     # Step 3: Evaluate model
     # -------------------------------------
 
-    if run_success:
-        xtest_data = train_task.outputs['xtest_output']
-        ytest_data = train_task.outputs['ytest_output']
-        model_artifact = train_task.outputs['model_output']
-
-        evaluate_task = evaluate_model(
-            xtest_data=xtest_data,
-            ytest_data=ytest_data,
-            model=model_artifact
-        ).after(train_task)  # Make sure to run after training
+    xtest_data = train_task.outputs['xtest_output']
+    ytest_data = train_task.outputs['ytest_output']
+    model_artifact = train_task.outputs['model_output']
 
-    run_success = evaluate_task.output
+    evaluate_model(
+        xtest_data=xtest_data,
+        ytest_data=ytest_data,
+        model=model_artifact
+    ).after(train_task)  # Make sure to run after training
 
     # -------------------------------------
     # Step 4: Register model
     # -------------------------------------
 
-    if run_success:
-        # Instead of registering the model,
-        # we register the custom middleware
-        # to Vertex AI Model Registry
-        register_task = register_model(
-            project_id=project_id,
-            region=region,
-            display_name='xgb-model',
-            model_artifact=model_artifact,
-            container_image_uri=container_image_uri,
-        ).after(evaluate_task)
-
-    run_success = register_task.outputs['Output']
+    # Instead of registering the model,
+    # we register the custom middleware
+    # to Vertex AI Model Registry
+    register_task = register_model(
+        project_id=project_id,
+        region=region,
+        display_name='xgb-model',
+        model_artifact=model_artifact,
+        container_image_uri=container_image_uri,
+    )  # Only needs the trained model - runs alongside the evaluation
 
     # -------------------------------------
     # Step 5: Deploy model
     # -------------------------------------
 
-    if run_success:
-
-        model_resource = register_task.outputs['model_resource']
+    model_resource = register_task.outputs['model_resource']
 
-        deploy_task = deploy_model(
-            project_id=project_id,
-            region=region,
-            endpoint_name=endpoint_name,
-            container_image_uri=container_image_uri,
-            model_resource=model_resource,
-        ).after(register_task)
-
-    run_success = deploy_task.output
-
-    if run_success:
-        logger.info('Pipeline completed successfully.')
-    else:
-        logger.error('Pipeline failed.')
+    deploy_model(
+        project_id=project_id,
+        region=region,
+        endpoint_name=endpoint_name,
+        container_image_uri=container_image_uri,
+        model_resource=model_resource,
+    ).after(register_task)
 
 
 @pipeline(
@@ -205,8 +200,21 @@ def mental_health_pipeline(
     )
 
 
-# Compile the pipeline
-Compiler().compile(
-    pipeline_func=mental_health_pipeline,
-    package_path='pipeline.json',  # Use this for deploying the pipeline
-)
+def compile_pipeline(package_path='pipeline.json'):
+    """
+    Compile the pipeline into its JSON template.
+
+    Args:
+        package_path (str): The path of the compiled pipeline template.
+    """
+
+    Compiler().compile(
+        pipeline_func=mental_health_pipeline,
+        package_path=package_path,  # Use this for deploying the pipeline
+    )
+
+
+# Compile the pipeline when run as a script (terraform's
+# generate_pipeline_json), not as a side effect of importing the module
+if __name__ == '__main__':
+    compile_pipeline()
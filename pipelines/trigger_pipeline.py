@@ -30,6 +30,10 @@ ENTITY_TYPE_ID = 'cdc_training'
 ENDPOINT_NAME = 'mlops-endpoint'
 CONTAINER_IMAGE_URI = f'us-central1-docker.pkg.dev/ml-mentalhealth/mlops-repo/{ENDPOINT_NAME}:v0.1.9'
 
+# Compile the pipeline template
+
+pipeline.compile_pipeline('pipeline.json')
+
 # Create the pipeline job
 
 job = aiplatform.PipelineJob(
@@ -89,6 +89,10 @@ resource "null_resource" "generate_pipeline_json" {
   provisioner "local-exec" {
     command     = "python3 ../pipelines/pipeline.py"
     working_dir = "${path.module}/../pipelines/"
+    # Compile the components against their prebuilt images
+    environment = {
+      COMPONENT_IMAGE_REPO = local.component_image_repo
+    }
   }
 
   lifecycle {
@@ -96,7 +100,10 @@ resource "null_resource" "generate_pipeline_json" {
     ignore_changes = all
   }
 
-  depends_on = [ google_storage_bucket.mlops_gcs_bucket ]
+  depends_on = [
+    google_storage_bucket.mlops_gcs_bucket,
+    null_resource.pipeline_component_images,
+  ]
 }
 
 resource "null_resource" "dataset_ingest" {
@@ -292,3 +299,55 @@ resource "null_resource" "vertexai_endpoint_middleware" {
     prevent_destroy = false
   }
 }
+
+# ----------------------------------------------------------------------
+#  Build the prebuilt pipeline component images.
+#  Components run on these images with their dependencies baked in,
+#  instead of pip installing them at every pipeline step start.
+#  See docker/pipeline-components and pipelines/components/images.py.
+# ----------------------------------------------------------------------
+
+locals {
+  component_image_repo = "${var.region}-docker.pkg.dev/${var.project_id}/mlops-repo"
+  # Image name => requirements file in docker/pipeline-components
+  component_images = {
+    "mh-preprocess"    = "preprocess.txt"
+    "mh-train"         = "train.txt"
+    "mh-evaluate"      = "evaluate.txt"
+    "mh-register"      = "register.txt"
+    "mh-deploy-vertex" = "deploy-vertex.txt"
+    "mh-deploy-run"    = "deploy-run.txt"
+  }
+}
+
+resource "null_resource" "pipeline_component_images" {
+  for_each   = local.component_images
+  depends_on = [ google_artifact_registry_repository.mlops_repo ]
+
+  # Rebuild when the image's requirements change
+  triggers = {
+    requirements = filesha1("${path.module}/../docker/pipeline-components/${each.value}")
+  }
+
+  provisioner "local-exec" {
+    command     = <<EOT
+      #!/bin/bash
+      set -e
+
+      IMAGE_ID=${local.component_image_repo}/${each.key}:py312
+
+      cd ../docker/pipeline-components
+
+      # BuildKit keeps the pip cache mount between builds
+      DOCKER_BUILDKIT=1 docker build --platform=linux/amd64 \
+        --build-arg REQUIREMENTS=${each.value} -t $IMAGE_ID .
+
+      docker push $IMAGE_ID
+    EOT
+    interpreter = ["/bin/bash", "-c"]
+  }
+
+  lifecycle {
+    prevent_destroy = false
+  }
+}
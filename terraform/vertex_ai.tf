@@ -13,12 +13,13 @@
   Steps:
   1. Zip the function source files from the project directory
       on the development machine. The source files are located in
-      cloud_functions/trigger_pipeline in the project directory.
+      cloud_functions/vertex_trigger in the project directory. Every
+      pipeline trigger deploys this same source with its own environment.
 */
 resource "archive_file" "trigger_pipeline_zip" {
   type        = "zip"
-  source_dir  = "../cloud_functions/trigger_pipeline"
-  output_path = "../cloud_functions/trigger_pipeline/trigger_pipeline.zip"
+  source_dir  = "../cloud_functions/vertex_trigger"
+  output_path = "../cloud_functions/vertex_trigger/trigger_pipeline.zip"
 
   lifecycle {
     prevent_destroy = false
@@ -43,7 +44,7 @@ resource "google_storage_bucket_object" "trigger_pipeline_zip" {
 resource "google_cloudfunctions_function" "trigger_pipeline" {
   name                  = "trigger-vertex-pipeline"
   runtime               = "python312"
-  entry_point           = "trigger_pipeline" # The executable function to run
+  entry_point           = "handle" # The executable function to run
   source_archive_bucket = google_storage_bucket.mlops_gcs_bucket.name
   source_archive_object = google_storage_bucket_object.trigger_pipeline_zip.name
   trigger_http          = true
@@ -51,9 +52,10 @@ resource "google_cloudfunctions_function" "trigger_pipeline" {
   environment_variables = {
     PROJECT_ID = var.project_id
     REGION     = var.region
-    # Set the bucket destination for the executable pipeline trigger
-    # python file.
-    BUCKET_NAME = local.pipelines_bucket
+    # Set the compiled pipeline template and the pipeline run root
+    TEMPLATE_PATH = "gs://${local.pipelines_bucket}/pipeline.json"
+    PIPELINE_ROOT = "gs://${local.pipelines_bucket}"
+    DISPLAY_NAME  = "data-preprocessing-pipeline"
   }
   #ingress_settings = "ALLOW_INTERNAL_AND_GCLB" # debug option: ALLOW_ALL
   ingress_settings = "ALLOW_ALL"